@@ -1,32 +1,490 @@
-from flask import Flask, request, jsonify, session, render_template
+from flask import Flask, Response, g, has_request_context, request, jsonify, session, render_template, stream_with_context
+from flask.logging import default_handler
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from sqlalchemy import and_, case, column, delete, event, exists, func, insert, literal_column, or_, table, text, true, tuple_, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from functools import lru_cache
+import base64
+import binascii
+import click
+import csv
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///blog.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///blog.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'your_secret_key'
+
+# Logging is quiet by default; set LOG_LEVEL=DEBUG to see per-request details.
+# SLOW_REQUEST_MS > 0 logs requests slower than that, with the SQL they issued.
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'WARNING').upper()
+app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 0))
+
+logger = logging.getLogger('blog')
+logger.setLevel(app.config['LOG_LEVEL'])
+logger.addHandler(default_handler)
+
+# Database engine profile
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['SQLITE_PRAGMAS'] = os.environ.get('SQLITE_PRAGMAS', '1') != '0'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+def engine_options(uri):
+    url = make_url(uri)
+    # In-memory SQLite uses a single shared connection, so pool sizing does not apply
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    return {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+    }
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+# Password hashing: HASH_WORKERS=0 hashes inline on the request thread
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['HASH_WORKERS'] = int(os.environ.get('HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+app.config['HASH_QUEUE_DEPTH'] = int(os.environ.get('HASH_QUEUE_DEPTH', 16))
+app.config['HASH_TIMEOUT'] = float(os.environ.get('HASH_TIMEOUT', 10))
 db = SQLAlchemy(app)
 
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a writer commits; busy_timeout makes writers
+    # wait for the lock instead of failing with "database is locked".
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+    cursor.execute(f"PRAGMA mmap_size={app.config['SQLITE_MMAP_SIZE']}")
+    cursor.close()
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        if app.config['SLOW_REQUEST_MS'] and len(g.sql_statements) < 50:
+            g.sql_statements.append(f'{statement} ({elapsed * 1000:.1f}ms)')
+
+with app.app_context():
+    if db.engine.dialect.name == 'sqlite' and app.config['SQLITE_PRAGMAS']:
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in Prometheus text format."""
+
+    HELP = {
+        'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status.'),
+        'http_request_duration_seconds': ('histogram', 'Request latency in seconds.'),
+        'http_request_sql_statements': ('histogram', 'SQL statements executed per request.'),
+        'http_request_sql_duration_seconds': ('histogram', 'Time spent in SQL per request, in seconds.'),
+        'http_response_size_bytes': ('histogram', 'Response body size in bytes.'),
+    }
+    BUCKETS = {
+        'http_request_duration_seconds': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+        'http_request_sql_statements': (0, 1, 2, 5, 10, 20, 50, 100),
+        'http_request_sql_duration_seconds': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+        'http_response_size_bytes': (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self._histograms = {}
+
+    def inc(self, name, labels):
+        with self._lock:
+            self._counters[(name, labels)] += 1
+
+    def observe(self, name, labels, value):
+        buckets = self.BUCKETS[name]
+        with self._lock:
+            series = self._histograms.setdefault((name, labels), [0] * (len(buckets) + 1) + [0.0])
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def totals(self, name):
+        """Return {labels: (sum, count)} for a histogram."""
+        with self._lock:
+            return {labels: (series[-1], sum(series[:-1]))
+                    for (series_name, labels), series in self._histograms.items() if series_name == name}
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        escaped = []
+        for key, value in pairs:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{key}="{value}"')
+        return '{' + ','.join(escaped) + '}' if pairs else ''
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(series) for key, series in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in self.HELP.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (series_name, labels), value in sorted(counters.items()):
+                    if series_name == name:
+                        lines.append(f'{name}{self._labels(labels)} {value}')
+                continue
+            buckets = self.BUCKETS[name]
+            for (series_name, labels), series in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), series[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{self._labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{self._labels(labels)} {series[-1]}')
+                lines.append(f'{name}_count{self._labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_statements = []
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_start' not in g:
+        return response
+    # Streamed bodies run their queries after this hook, so those requests are
+    # recorded once the server has sent the whole body and closes the response
+    stats = g._get_current_object()
+    endpoint, method, path = request.endpoint or 'unmatched', request.method, request.path
+    if response.is_streamed:
+        response.call_on_close(lambda: observe_request(stats, endpoint, method, path, response))
+    else:
+        observe_request(stats, endpoint, method, path, response)
+    return response
+
+def observe_request(stats, endpoint, method, path, response):
+    duration = time.perf_counter() - stats.request_start
+    labels = (('endpoint', endpoint),)
+
+    metrics.inc('http_requests_total', labels + (('method', method), ('status', response.status_code)))
+    metrics.observe('http_request_duration_seconds', labels, duration)
+    metrics.observe('http_request_sql_statements', labels, stats.sql_count)
+    metrics.observe('http_request_sql_duration_seconds', labels, stats.sql_time)
+    # Streamed responses have no length up front and are left out of the size histogram
+    if response.content_length is not None:
+        metrics.observe('http_response_size_bytes', labels, response.content_length)
+
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    if slow_ms and duration * 1000 >= slow_ms:
+        logger.warning('Slow request: %s %s took %.1fms with %d SQL statements (%.1fms)%s',
+                       method, path, duration * 1000, stats.sql_count, stats.sql_time * 1000,
+                       ''.join(f'\n    {statement}' for statement in stats.sql_statements))
+
 # User Model
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
+# Post visibility: one row per (post, viewer). A post without rows is public.
+# Restricted posts always carry a row for their author as well, so a post that
+# loses all its other viewers stays private to the author instead of going public.
+post_viewer = db.Table(
+    'post_viewer',
+    db.Column('post_id', db.Integer, db.ForeignKey('blog_post.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('viewer_id', db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_post_viewer_viewer_id_post_id', 'viewer_id', 'post_id')
+)
+
 # BlogPost Model
 class BlogPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    visible_to = db.Column(db.Text, default="")  # Comma-separated list of usernames
+    author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    viewers = db.relationship('User', secondary=post_viewer)
 
-# Create database tables within the application context
-with app.app_context():
+# Feed version shared by every worker process: a single row bumped in the same
+# transaction as each write to posts or their viewers.
+class FeedState(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    modified_at = db.Column(db.Integer, nullable=False, default=0)  # Unix seconds
+
+# Full-text index over BlogPost.content. It is an external-content FTS5 table
+# kept in sync by triggers, so every write path updates it incrementally.
+blog_post_fts = table('blog_post_fts', column('rowid'))
+
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5(content, content='blog_post', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert AFTER INSERT ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete AFTER DELETE ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_update AFTER UPDATE OF content ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO blog_post_fts(rowid, content) VALUES (new.id, new.content); END",
+)
+
+def search_supported():
+    return db.engine.dialect.name == 'sqlite'
+
+def init_search_index():
+    if not search_supported():
+        return
+    created = not db.inspect(db.engine).has_table('blog_post_fts')
+    for statement in SEARCH_INDEX_DDL:
+        db.session.execute(text(statement))
+    # Posts written before the index existed have to be indexed once
+    if created:
+        rebuild_search_index()
+    db.session.commit()
+
+def rebuild_search_index():
+    db.session.execute(text("INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')"))
+
+class SchemaOutdated(Exception):
+    """Raised when the database predates a schema change that needs a migration."""
+
+def legacy_author_schema():
+    # The earliest schema stored the author's username in blog_post.author
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table('blog_post'):
+        return False
+    columns = {column['name'] for column in inspector.get_columns('blog_post')}
+    return 'author' in columns and 'author_id' not in columns
+
+def migrate_authors():
+    """Replace blog_post.author usernames with author_id references.
+
+    Authors without an account get a placeholder user that cannot log in, so
+    their posts keep their author name. Returns (posts, placeholder usernames).
+    """
     db.create_all()
+    authors = set(db.session.execute(text('SELECT DISTINCT author FROM blog_post')).scalars())
+    _, missing = resolve_usernames(authors)
+    # '!' is not a valid password hash, so check_password_hash always rejects it
+    db.session.add_all([User(username=username, password='!') for username in sorted(missing)])
+    db.session.flush()
+    db.session.execute(text('ALTER TABLE blog_post ADD COLUMN author_id INTEGER REFERENCES user (id)'))
+    db.session.execute(text(
+        'UPDATE blog_post SET author_id = (SELECT user.id FROM user WHERE user.username = blog_post.author)'
+    ))
+    posts = db.session.execute(text('SELECT COUNT(*) FROM blog_post')).scalar()
+    db.session.execute(text('ALTER TABLE blog_post DROP COLUMN author'))
+    db.session.commit()
+    return posts, missing
+
+def init_db():
+    """Create tables, indexes and the search index. Safe to run on an existing database."""
+    if legacy_author_schema():
+        raise SchemaOutdated("blog_post still has the legacy 'author' column; "
+                             "run 'flask migrate-authors' first")
+    db.create_all()
+    # create_all only adds indexes together with a new table, so tables created
+    # by older versions of the app need theirs added explicitly
+    for model_table in db.metadata.sorted_tables:
+        for index in model_table.indexes:
+            index.create(db.engine, checkfirst=True)
+    if db.session.get(FeedState, 1) is None:
+        db.session.add(FeedState(id=1, version=0, modified_at=int(time.time())))
+        db.session.commit()
+    init_search_index()
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated or did not answer in time."""
+
+class HashingService:
+    """Runs password key derivation in a bounded process pool.
+
+    At most ``workers + queue_depth`` calls are in flight; anything beyond
+    that is rejected immediately with HashingBusy so cheap endpoints keep
+    their request threads instead of queueing behind a login burst.
+    """
+
+    def __init__(self, workers, queue_depth, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_depth) if workers else None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily so importing the app does not start worker processes
+        with self._lock:
+            if self._executor is None:
+                # Forking a threaded server can copy held locks and open database
+                # connections into the children, so workers start from a clean process
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(method))
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BrokenProcessPool as exc:
+            self._slots.release()
+            self._reset_executor()
+            raise HashingBusy() from exc
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot stays taken until the worker is done, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as exc:
+            raise HashingBusy() from exc
+        except BrokenProcessPool as exc:
+            self._reset_executor()
+            raise HashingBusy() from exc
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != current_hash_prefix(app.config['PASSWORD_HASH_METHOD'])
+
+@lru_cache(maxsize=None)
+def current_hash_prefix(method):
+    # werkzeug expands defaults (e.g. "scrypt" -> "scrypt:32768:8:1"), so let it tell us
+    return generate_password_hash('', method).split('$', 1)[0]
+
+hashing = HashingService(app.config['HASH_WORKERS'], app.config['HASH_QUEUE_DEPTH'], app.config['HASH_TIMEOUT'])
+
+def hashing_busy_response():
+    response = jsonify({'message': 'Server busy, try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+@app.cli.command('migrate-visibility')
+def migrate_visibility():
+    """Move the legacy comma-separated visible_to column into post_viewer."""
+    # Databases from before author_id need that migration first, or init_db refuses them
+    if legacy_author_schema():
+        posts, missing = migrate_authors()
+        click.echo(f'Migrated the author of {posts} posts first.')
+        if missing:
+            click.echo(f"Created placeholder users that cannot log in: {', '.join(sorted(missing))}")
+    init_db()
+    columns = [column['name'] for column in db.inspect(db.engine).get_columns('blog_post')]
+    if 'visible_to' not in columns:
+        click.echo('Nothing to migrate: blog_post.visible_to does not exist.')
+        return
+
+    rows = db.session.execute(text(
+        "SELECT id, author_id, visible_to FROM blog_post WHERE visible_to IS NOT NULL AND visible_to != ''"
+    )).all()
+    wanted = {post_id: {name.strip() for name in visible_to.split(',') if name.strip()}
+              for post_id, _, visible_to in rows}
+    user_ids, missing = resolve_usernames(set().union(*wanted.values()))
+    existing = set(db.session.execute(db.select(post_viewer.c.post_id, post_viewer.c.viewer_id)).all())
+
+    # Every restricted post keeps its author as a viewer, so a list made up only
+    # of unknown users still leaves the post private rather than public.
+    pairs, author_only = [], []
+    for post_id, author_id, _ in rows:
+        known = {user_ids[name] for name in wanted[post_id] if name in user_ids}
+        if not known - {author_id}:
+            author_only.append(post_id)
+        pairs.extend({'post_id': post_id, 'viewer_id': viewer_id}
+                     for viewer_id in post_viewer_ids(author_id, known, private=True)
+                     if (post_id, viewer_id) not in existing)
+    if pairs:
+        db.session.execute(post_viewer.insert(), pairs)
+    db.session.execute(text('ALTER TABLE blog_post DROP COLUMN visible_to'))
+    bump_feed_version()
+    db.session.commit()
+
+    click.echo(f'Migrated {len(pairs)} viewer entries from {len(rows)} posts.')
+    if missing:
+        click.echo(f"Unknown usernames were skipped: {', '.join(sorted(missing))}")
+    if author_only:
+        click.echo(f"Posts left visible to their author only: {', '.join(map(str, sorted(author_only)))}")
+
+@app.cli.command('migrate-authors')
+def migrate_authors_command():
+    """Move the legacy blog_post.author usernames to author_id."""
+    if not legacy_author_schema():
+        click.echo('Nothing to migrate: blog_post.author does not exist.')
+        return
+    posts, missing = migrate_authors()
+    init_db()
+    click.echo(f'Migrated the author of {posts} posts.')
+    if missing:
+        click.echo(f"Created placeholder users that cannot log in: {', '.join(sorted(missing))}")
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database schema. Run once before serving with 'flask run'."""
+    try:
+        init_db()
+    except SchemaOutdated as exc:
+        raise click.ClickException(str(exc))
+    click.echo('Database initialized.')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every post in the full-text search table."""
+    if not search_supported():
+        click.echo('Full-text search requires SQLite FTS5.')
+        return
+    init_search_index()
+    rebuild_search_index()
+    db.session.commit()
+    click.echo('Search index rebuilt.')
 
 @app.route('/')
 def index():
@@ -36,14 +494,23 @@ def index():
 def register():
     data = request.get_json()
     username = data['username']
-    password = generate_password_hash(data['password'])
 
     if User.query.filter_by(username=username).first():
         return jsonify({'message': 'Username already exists'}), 400
 
+    try:
+        password = hashing.hash(data['password'])
+    except HashingBusy:
+        return hashing_busy_response()
+
+    # The username may have been taken while the password was being hashed
     new_user = User(username=username, password=password)
     db.session.add(new_user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Username already exists'}), 400
     return jsonify({'message': 'User registered successfully'}), 201
 
 
@@ -52,7 +519,22 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(username=data['username']).first()
 
-    if user and check_password_hash(user.password, data['password']):
+    if not user:
+        return jsonify({'message': 'Invalid credentials'}), 401
+
+    try:
+        valid = hashing.verify(user.password, data['password'])
+    except HashingBusy:
+        return hashing_busy_response()
+
+    if valid:
+        # Upgrade hashes created with outdated parameters while we know the password
+        if hashing.needs_rehash(user.password):
+            try:
+                user.password = hashing.hash(data['password'])
+                db.session.commit()
+            except HashingBusy:
+                pass
         session['user_id'] = user.id
         session['username'] = user.username
         session['is_admin'] = user.is_admin
@@ -75,10 +557,10 @@ def create_post():
 
     new_post = BlogPost(content=data['content'], author_id=session['user_id'])
     db.session.add(new_post)
+    bump_feed_version()
     db.session.commit()
 
-    # Debug statement to check the new post
-    print(f"Post created: {new_post.content} by user_id {new_post.author_id}")
+    logger.debug("Post %s created by user_id %s", new_post.id, new_post.author_id)
     return jsonify({'message': 'Post created successfully'}), 201
 
 @app.route('/api/blog/<int:post_id>', methods=['DELETE'])
@@ -95,43 +577,382 @@ def delete_post(post_id):
         return jsonify({'message': 'Forbidden'}), 403
 
     db.session.delete(post)
+    bump_feed_version()
     db.session.commit()
     return jsonify({'message': 'Post deleted successfully'}), 200
 
 
+# Feed pagination settings
+FEED_DEFAULT_LIMIT = 20
+FEED_MAX_LIMIT = 100
+
+def encode_cursor(created_at, post_id):
+    raw = f"{created_at.isoformat()}|{post_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    # Cursors are opaque to clients; anything malformed is rejected with ValueError
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, post_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+def resolve_usernames(usernames):
+    # Returns ({username: user_id}, missing usernames) using a single query
+    usernames = set(usernames)
+    if not usernames:
+        return {}, set()
+    found = dict(db.session.execute(
+        db.select(User.username, User.id).where(User.username.in_(usernames))
+    ).all())
+    return found, usernames - found.keys()
+
+def parse_usernames(value):
+    # visible_to used to be a comma-separated string, so keep accepting that form
+    if value is None:
+        return set()
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list):
+        raise ValueError('expected a list of usernames')
+    return {name.strip() for name in value if isinstance(name, str) and name.strip()}
+
+def post_viewer_ids(author_id, viewer_ids, private=False):
+    # An empty list means public; anything else, or an explicit private flag,
+    # restricts the post and always includes its author.
+    viewer_ids = set(viewer_ids)
+    if private or viewer_ids:
+        return viewer_ids | {author_id}
+    return set()
+
+def visibility_filter():
+    # Public posts have no viewer rows; restricted posts are visible to their
+    # author and listed viewers only. Admins see everything.
+    if session.get('is_admin'):
+        return true()
+    user_id = session['user_id']
+    restricted = exists().where(post_viewer.c.post_id == BlogPost.id)
+    listed = exists().where(and_(post_viewer.c.viewer_id == user_id, post_viewer.c.post_id == BlogPost.id))
+    return or_(BlogPost.author_id == user_id, ~restricted, listed)
+
+def feed_query():
+    # Author names come from the same query instead of one lookup per post
+    return (db.session.query(BlogPost, User.username)
+            .outerjoin(User, User.id == BlogPost.author_id)
+            .filter(visibility_filter()))
+
+def serialize_post(post, author_name):
+    # Handle the case where the user does not exist
+    if author_name is None:
+        logger.debug("No user found for author_id %s", post.author_id)
+        author_name = "Unknown"
+
+    return {
+        'id': post.id,
+        'content': post.content,
+        'author': author_name,
+        'created_at': post.created_at,
+        # Include a flag to indicate if the current user can delete the post
+        'can_delete': post.author_id == session['user_id']
+    }
+
+# Feed response cache settings
+FEED_CACHE_SIZE = 256
+FEED_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Larger bodies (e.g. the legacy unpaginated feed) are served but never cached
+FEED_CACHE_MAX_ENTRY_BYTES = 1024 * 1024
+
+def feed_state():
+    """Return the shared feed version and its last modification time."""
+    query = db.select(FeedState.version, FeedState.modified_at).where(FeedState.id == 1)
+    row = db.session.execute(query).one_or_none()
+    if row is None:
+        # Databases served without 'flask init-db' start without the row. It is
+        # created on its own connection; a worker that loses the race just reads it.
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(FeedState).values(id=1, version=0, modified_at=int(time.time())))
+        except IntegrityError:
+            pass
+        row = db.session.execute(query).one()
+    version, modified_at = row
+    return version, datetime.fromtimestamp(modified_at, timezone.utc)
+
+def bump_feed_version():
+    # Runs inside the caller's transaction so the new version commits with the write.
+    # Last-Modified has one second resolution, so keep modified_at strictly increasing.
+    now = int(time.time())
+    result = db.session.execute(update(FeedState).where(FeedState.id == 1).values(
+        version=FeedState.version + 1,
+        modified_at=case((FeedState.modified_at + 1 > now, FeedState.modified_at + 1), else_=now)
+    ))
+    if result.rowcount == 0:
+        db.session.execute(insert(FeedState).values(id=1, version=1, modified_at=now))
+
+class FeedCache:
+    """Per-process LRU cache of encoded feed responses keyed by (viewer, page).
+
+    Entries are tagged with the shared feed version they were built from and
+    only served for that version, so a write on any worker invalidates every
+    worker's copy. Size is bounded by entry count and by total body bytes.
+    """
+
+    def __init__(self, max_entries, max_bytes, max_entry_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.version = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(key, version, last_modified):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return f"{version}-{int(last_modified.timestamp())}-{digest}"
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def put(self, key, version, body):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            if version < self.version:
+                return
+            # Entries from older versions can never be served again
+            if version > self.version:
+                self._entries.clear()
+                self._bytes = 0
+                self.version = version
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._entries[key] = (version, body)
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+feed_cache = FeedCache(FEED_CACHE_SIZE, FEED_CACHE_MAX_BYTES, FEED_CACHE_MAX_ENTRY_BYTES)
+
 @app.route('/api/blog', methods=['GET'])
 def get_posts():
     if 'user_id' not in session:
         return jsonify({'message': 'Unauthorized'}), 401
 
-    posts = BlogPost.query.all()
-    result = []
-
-    for post in posts:
-        author = User.query.get(post.author_id)
-        
-        # Handle the case where the user does not exist
-        if not author:
-            print(f"Warning: No user found for author_id {post.author_id}")
-            author_name = "Unknown"
-        else:
-            author_name = author.username
-        
-        # Include a flag to indicate if the current user can delete the post
-        can_delete = (post.author_id == session['user_id'])
+    # Only the parameters that shape the page are part of the key, so unrelated
+    # query arguments cannot be used to churn the cache
+    key = (session['user_id'], bool(session.get('is_admin')),
+           request.args.get('limit'), request.args.get('before'), request.args.get('after'))
+    # pysqlite opens no transaction for SELECTs, so a write may commit between this
+    # read and the feed query. Reading the version first keeps that safe: the page
+    # can only be newer than its version, so it is rebuilt early but never served stale.
+    version, last_modified = feed_state()
+    etag = feed_cache.etag(key, version, last_modified)
+
+    # Conditional requests are answered without building or encoding the feed
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(request.if_modified_since) and last_modified <= request.if_modified_since
+
+    if not_modified:
+        response = app.response_class(status=304)
+    else:
+        body = feed_cache.get(key, version)
+        if body is None:
+            result, status = build_feed()
+            if status != 200:
+                return jsonify(result), status
+            body = app.json.dumps(result).encode()
+            feed_cache.put(key, version, body)
+        response = app.response_class(body, mimetype='application/json')
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+def build_feed():
+    # Without paging parameters the legacy unpaginated list is returned
+    if not any(arg in request.args for arg in ('limit', 'before', 'after')):
+        result = [serialize_post(post, author_name) for post, author_name in feed_query().all()]
+        logger.debug("Fetched %d posts for user %s", len(result), session.get('user_id'))
+        return result, 200
+
+    try:
+        limit = int(request.args.get('limit', FEED_DEFAULT_LIMIT))
+    except ValueError:
+        return {'message': 'Invalid limit'}, 400
+    if limit < 1:
+        return {'message': 'Invalid limit'}, 400
+    limit = min(limit, FEED_MAX_LIMIT)
+
+    before = request.args.get('before')
+    after = request.args.get('after')
+    if before and after:
+        return {'message': 'Use either before or after, not both'}, 400
+
+    try:
+        cursor = decode_cursor(before or after) if (before or after) else None
+    except ValueError:
+        return {'message': 'Invalid cursor'}, 400
 
-        result.append({
-            'id': post.id,
-            'content': post.content,
-            'author': author_name,
-            'created_at': post.created_at,
-            'can_delete': can_delete
-        })
+    # The feed is ordered newest first on (created_at, id); "before" walks towards
+    # older posts and "after" towards newer ones. A row-value comparison lets the
+    # database seek straight to the cursor instead of filtering an OR per row.
+    query = feed_query()
+    position = tuple_(BlogPost.created_at, BlogPost.id)
+    if after:
+        query = query.filter(position > tuple_(*cursor))
+        query = query.order_by(BlogPost.created_at.asc(), BlogPost.id.asc())
+    else:
+        if before:
+            query = query.filter(position < tuple_(*cursor))
+        query = query.order_by(BlogPost.created_at.desc(), BlogPost.id.desc())
 
-    print(f"Posts fetched for user {session.get('user_id')}: {result}")
-    return jsonify(result), 200
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after:
+        rows.reverse()
 
+    posts = [serialize_post(post, author_name) for post, author_name in rows]
+    newest, oldest = (rows[0][0], rows[-1][0]) if rows else (None, None)
 
+    # A page reached through "after" always has older posts behind it, and a page
+    # reached through "before" always has newer ones in front of it.
+    has_older = has_more if not after else True
+    has_newer = has_more if after else bool(before)
+
+    return {
+        'posts': posts,
+        'next_cursor': encode_cursor(oldest.created_at, oldest.id) if oldest and has_older else None,
+        'prev_cursor': encode_cursor(newest.created_at, newest.id) if newest and has_newer else None
+    }, 200
+
+
+
+def fts_query(terms):
+    # Control characters separate terms like whitespace; a NUL would otherwise end
+    # the FTS5 query string early and fail the whole query
+    terms = re.sub(r'[\x00-\x1f\x7f]', ' ', terms)
+    # Quote every term so user input is matched literally instead of parsed as FTS5 syntax
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms.split())
+
+@app.route('/api/blog/search', methods=['GET'])
+def search_posts():
+    if 'user_id' not in session:
+        return jsonify({'message': 'Unauthorized'}), 401
+    if not search_supported():
+        return jsonify({'message': 'Search is not available on this database'}), 501
+
+    match = fts_query(request.args.get('q', ''))
+    if not match:
+        return jsonify({'message': 'q is required'}), 400
+
+    try:
+        limit = int(request.args.get('limit', FEED_DEFAULT_LIMIT))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'message': 'Invalid limit or offset'}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({'message': 'Invalid limit or offset'}), 400
+    limit = min(limit, FEED_MAX_LIMIT)
+
+    # bm25() is lower for better matches; id breaks ties so pages are stable
+    rank = func.bm25(literal_column('blog_post_fts'))
+    rows = (feed_query()
+            .join(blog_post_fts, blog_post_fts.c.rowid == BlogPost.id)
+            .filter(literal_column('blog_post_fts').op('MATCH')(match))
+            .order_by(rank, BlogPost.id)
+            .offset(offset)
+            .limit(limit + 1)
+            .all())
+
+    return jsonify({
+        'posts': [serialize_post(post, author_name) for post, author_name in rows[:limit]],
+        'next_offset': offset + limit if len(rows) > limit else None
+    }), 200
+
+# Rows fetched per round-trip while streaming an export
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ('id', 'author_id', 'author', 'created_at', 'content')
+
+@app.route('/api/blog/export', methods=['GET'])
+def export_posts():
+    if 'user_id' not in session:
+        return jsonify({'message': 'Unauthorized'}), 401
+    if not session.get('is_admin'):
+        return jsonify({'message': 'Forbidden'}), 403
+
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'message': 'format must be ndjson or csv'}), 400
+
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'message': 'Invalid since, expected an ISO 8601 datetime'}), 400
+        # created_at is stored as naive UTC, so offsets are normalised before comparing
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Ordered by (created_at, id) so the last exported created_at can seed the next "since"
+    query = (db.select(BlogPost.id, BlogPost.author_id, User.username, BlogPost.created_at, BlogPost.content)
+             .outerjoin(User, User.id == BlogPost.author_id)
+             .order_by(BlogPost.created_at, BlogPost.id)
+             .execution_options(yield_per=EXPORT_BATCH_SIZE))
+    if since:
+        query = query.where(BlogPost.created_at >= since)
+
+    def generate():
+        # Rows are pulled from a server-side cursor one batch at a time, so
+        # memory stays flat regardless of table size.
+        result = db.session.execute(query)
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if export_format == 'csv':
+                writer.writerow(EXPORT_FIELDS)
+            for rows in result.partitions():
+                for post_id, author_id, author_name, created_at, content in rows:
+                    record = (post_id, author_id, author_name or 'Unknown',
+                              created_at.isoformat() if created_at else None, content)
+                    if export_format == 'csv':
+                        writer.writerow(record)
+                    else:
+                        buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, record))))
+                        buffer.write('\n')
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            result.close()
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=posts.{export_format}'
+    return response
 
 @app.route('/api/blog/<int:post_id>', methods=['DELETE', 'PUT'])
 def manage_post(post_id):
@@ -145,24 +966,229 @@ def manage_post(post_id):
     if session['is_admin'] or post.author_id == session['user_id']:
         if request.method == 'DELETE':
             db.session.delete(post)
+            bump_feed_version()
             db.session.commit()
             return jsonify({'message': 'Post deleted successfully'}), 200
 
         if request.method == 'PUT':
             data = request.get_json()
             post.content = data.get('content', post.content)
-            post.visible_to = ",".join(data.get('visible_to', post.visible_to.split(',')))
+            if 'visible_to' in data or data.get('private'):
+                try:
+                    names = parse_usernames(data.get('visible_to'))
+                except ValueError:
+                    return jsonify({'message': 'visible_to must be a list of usernames'}), 400
+                user_ids, missing = resolve_usernames(names)
+                if missing:
+                    return jsonify({'message': 'Unknown users', 'usernames': sorted(missing)}), 400
+                viewer_ids = post_viewer_ids(post.author_id, user_ids.values(), data.get('private'))
+                post.viewers = User.query.filter(User.id.in_(viewer_ids)).all()
+            bump_feed_version()
             db.session.commit()
             return jsonify({'message': 'Post updated successfully'}), 200
 
     return jsonify({'message': 'Unauthorized'}), 403
 
+@app.route('/api/blog/<int:post_id>/viewers', methods=['GET', 'POST', 'DELETE'])
+def manage_post_viewers(post_id):
+    if 'user_id' not in session:
+        return jsonify({'message': 'Unauthorized'}), 401
+
+    post = BlogPost.query.get(post_id)
+    if not post:
+        return jsonify({'message': 'Post not found'}), 404
+
+    if not (session['is_admin'] or post.author_id == session['user_id']):
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    if request.method == 'GET':
+        viewers = db.session.execute(
+            db.select(User.username)
+            .join(post_viewer, post_viewer.c.viewer_id == User.id)
+            .where(post_viewer.c.post_id == post_id)
+            .order_by(User.username)
+        ).scalars().all()
+        return jsonify({'viewers': viewers}), 200
+
+    data = request.get_json()
+    if not data or 'usernames' not in data:
+        return jsonify({'message': 'usernames is required'}), 400
+
+    try:
+        names = parse_usernames(data['usernames'])
+    except ValueError:
+        return jsonify({'message': 'usernames must be a list of usernames'}), 400
+    user_ids, missing = resolve_usernames(names)
+    if missing:
+        return jsonify({'message': 'Unknown users', 'usernames': sorted(missing)}), 400
+
+    # Only touch the affected rows instead of rewriting the whole viewer list
+    if request.method == 'POST':
+        viewer_ids = post_viewer_ids(post.author_id, user_ids.values())
+        existing = set(db.session.execute(
+            db.select(post_viewer.c.viewer_id)
+            .where(post_viewer.c.post_id == post_id, post_viewer.c.viewer_id.in_(viewer_ids))
+        ).scalars())
+        new_rows = [{'post_id': post_id, 'viewer_id': user_id}
+                    for user_id in viewer_ids if user_id not in existing]
+        if new_rows:
+            db.session.execute(post_viewer.insert(), new_rows)
+        bump_feed_version()
+        db.session.commit()
+        return jsonify({'message': 'Viewers added'}), 200
+
+    # The author's row stays, so removing everyone else leaves the post private
+    removed = set(user_ids.values()) - {post.author_id}
+    if removed:
+        db.session.execute(post_viewer.delete().where(
+            post_viewer.c.post_id == post_id, post_viewer.c.viewer_id.in_(removed)
+        ))
+    bump_feed_version()
+    db.session.commit()
+    return jsonify({'message': 'Viewers removed'}), 200
+
+# Upper bound on operations accepted by a single batch request
+BATCH_MAX_OPERATIONS = 1000
+
+@app.route('/api/blog/batch', methods=['POST'])
+def batch_posts():
+    if 'user_id' not in session:
+        return jsonify({'message': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True)
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'message': 'operations must be a non-empty list'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({'message': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}), 400
+
+    user_id = session['user_id']
+    is_admin = session.get('is_admin')
+
+    # Everything the batch refers to is looked up up front, one query per kind
+    post_ids = {op.get('id') for op in operations
+                if isinstance(op, dict) and op.get('op') in ('update', 'delete') and type(op.get('id')) is int}
+    authors = dict(db.session.execute(
+        db.select(BlogPost.id, BlogPost.author_id).where(BlogPost.id.in_(post_ids))
+    ).all()) if post_ids else {}
+    # A malformed list is kept as None so only that operation fails
+    op_usernames = {}
+    for index, op in enumerate(operations):
+        if isinstance(op, dict) and 'visible_to' in op:
+            try:
+                op_usernames[index] = parse_usernames(op['visible_to'])
+            except ValueError:
+                op_usernames[index] = None
+    user_ids, _ = resolve_usernames(set().union(*filter(None, op_usernames.values())))
+
+    results = []
+    creates, create_results, create_viewers = [], [], []
+    updates, viewer_updates, deletes = [], {}, set()
+
+    for index, op in enumerate(operations):
+        kind = op.get('op') if isinstance(op, dict) else None
+        result = {'index': index, 'op': kind}
+        results.append(result)
+
+        if kind not in ('create', 'update', 'delete'):
+            result.update(status=400, message='op must be create, update or delete')
+            continue
+
+        viewers = None
+        if 'visible_to' in op:
+            names = op_usernames[index]
+            if names is None:
+                result.update(status=400, message='visible_to must be a list of usernames')
+                continue
+            missing = names - user_ids.keys()
+            if missing:
+                result.update(status=400, message=f"Unknown users: {', '.join(sorted(missing))}")
+                continue
+            viewers = {user_ids[name] for name in names}
+
+        if kind == 'create':
+            if not isinstance(op.get('content'), str) or not op['content']:
+                result.update(status=400, message='Content is required')
+                continue
+            creates.append({'content': op['content'], 'author_id': user_id})
+            create_results.append(result)
+            create_viewers.append(post_viewer_ids(user_id, viewers or (), op.get('private')))
+            continue
+
+        post_id = op.get('id')
+        result['id'] = post_id
+        # JSON true/false are ints to Python, but never post ids
+        if type(post_id) is not int or post_id not in authors or post_id in deletes:
+            result.update(status=404, message='Post not found')
+            continue
+        if not (is_admin or authors[post_id] == user_id):
+            result.update(status=403, message='Unauthorized')
+            continue
+
+        if kind == 'delete':
+            deletes.add(post_id)
+            result.update(status=200, message='Post deleted successfully')
+            continue
+
+        if 'content' in op:
+            if not isinstance(op['content'], str) or not op['content']:
+                result.update(status=400, message='Content is required')
+                continue
+            updates.append({'id': post_id, 'content': op['content']})
+        if viewers is not None or op.get('private'):
+            viewer_updates[post_id] = post_viewer_ids(authors[post_id], viewers or (), op.get('private'))
+        result.update(status=200, message='Post updated successfully')
+
+    # Apply everything with bulk statements inside a single transaction
+    if creates:
+        # A single multi-row INSERT ... RETURNING. Asking SQLite for the rows in
+        # parameter order would fall back to one INSERT per row, so ids are matched
+        # back by content instead; rows with equal content share author and
+        # created_at, so they are interchangeable until viewers are attached.
+        created_at = datetime.utcnow()
+        pending = defaultdict(deque)
+        for row, result, viewers in zip(creates, create_results, create_viewers):
+            row['created_at'] = created_at
+            pending[row['content']].append((result, viewers))
+        for post_id, content in db.session.execute(insert(BlogPost).returning(BlogPost.id, BlogPost.content), creates):
+            result, viewers = pending[content].popleft()
+            result.update(id=post_id, status=201, message='Post created successfully')
+            if viewers:
+                viewer_updates[post_id] = viewers
+
+    # Deletes win over earlier updates to the same post
+    updates = [row for row in updates if row['id'] not in deletes]
+    if updates:
+        db.session.execute(update(BlogPost), updates)
+
+    viewer_updates = {post_id: viewers for post_id, viewers in viewer_updates.items() if post_id not in deletes}
+    if viewer_updates:
+        db.session.execute(delete(post_viewer).where(post_viewer.c.post_id.in_(viewer_updates)))
+        rows = [{'post_id': post_id, 'viewer_id': viewer_id}
+                for post_id, viewers in viewer_updates.items() for viewer_id in viewers]
+        if rows:
+            db.session.execute(post_viewer.insert(), rows)
+
+    if deletes:
+        db.session.execute(delete(post_viewer).where(post_viewer.c.post_id.in_(deletes)))
+        db.session.execute(delete(BlogPost).where(BlogPost.id.in_(deletes)).execution_options(synchronize_session=False))
+
+    if creates or updates or viewer_updates or deletes:
+        bump_feed_version()
+        db.session.commit()
+
+    return jsonify({'results': results}), 200
+
 @app.route('/api/check-session', methods=['GET'])
 def check_session():
     if 'user_id' in session:
         return jsonify({'logged_in': True, 'is_admin': session['is_admin'], 'username': session['username']}), 200
     return jsonify({'logged_in': False}), 200
 
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/about', methods=['GET'])
 def api_documentation():
     documentation = {
@@ -178,7 +1204,7 @@ def api_documentation():
                 "response_format": {
                     "message": "string"
                 },
-                "authorization": "No authorization required."
+                "authorization": "No authorization required. Returns 503 with Retry-After when the password hashing queue is full."
             },
             {
                 "method": "POST",
@@ -191,7 +1217,7 @@ def api_documentation():
                 "response_format": {
                     "message": "string"
                 },
-                "authorization": "No authorization required."
+                "authorization": "No authorization required. Returns 503 with Retry-After when the password hashing queue is full."
             },
             {
                 "method": "POST",
@@ -218,7 +1244,7 @@ def api_documentation():
             {
                 "method": "GET",
                 "endpoint": "/api/blog",
-                "description": "Retrieve all blog posts. Includes a 'can_delete' flag if the logged-in user owns the post.",
+                "description": "Retrieve all blog posts visible to the logged-in user. Includes a 'can_delete' flag if the logged-in user owns the post. Responses carry ETag and Last-Modified headers; send If-None-Match or If-Modified-Since to get a 304 when the feed has not changed.",
                 "request_format": "None",
                 "response_format": [
                     {
@@ -231,6 +1257,18 @@ def api_documentation():
                 ],
                 "authorization": "Requires session."
             },
+            {
+                "method": "GET",
+                "endpoint": "/api/blog?limit=<n>&before=<cursor>&after=<cursor>",
+                "description": "Retrieve a page of blog posts, newest first. Passing any of 'limit', 'before' or 'after' switches to paginated mode. 'limit' defaults to 20 (max 100); use 'next_cursor' as 'before' to get older posts and 'prev_cursor' as 'after' to get newer ones.",
+                "request_format": "Query parameters: limit (integer), before (cursor), after (cursor)",
+                "response_format": {
+                    "posts": "list of posts in the same format as the unpaginated feed",
+                    "next_cursor": "string or null",
+                    "prev_cursor": "string or null"
+                },
+                "authorization": "Requires session."
+            },
             {
                 "method": "DELETE",
                 "endpoint": "/api/blog/<post_id>",
@@ -241,6 +1279,78 @@ def api_documentation():
                 },
                 "authorization": "Requires session and user must own the post."
             },
+            {
+                "method": "PUT",
+                "endpoint": "/api/blog/<post_id>",
+                "description": "Update a blog post. 'visible_to' replaces the full list of users allowed to see the post; an empty list makes it public. 'private': true keeps the post restricted even when no other users are listed, making it visible to its author only. The author can always see their own posts.",
+                "request_format": {
+                    "content": "string (optional)",
+                    "visible_to": "list of usernames (optional)",
+                    "private": "boolean (optional)"
+                },
+                "response_format": {
+                    "message": "string"
+                },
+                "authorization": "Requires session and user must own the post or be an admin."
+            },
+            {
+                "method": "GET, POST, DELETE",
+                "endpoint": "/api/blog/<post_id>/viewers",
+                "description": "List, add or remove users allowed to see a post without rewriting the whole list. Posts without viewers are visible to everyone. Restricted posts always list their author, who cannot be removed, so removing every other viewer leaves the post private to its author.",
+                "request_format": {
+                    "usernames": "list of usernames (POST and DELETE only)"
+                },
+                "response_format": {
+                    "viewers": "list of usernames (GET)",
+                    "message": "string (POST and DELETE)"
+                },
+                "authorization": "Requires session and user must own the post or be an admin."
+            },
+            {
+                "method": "GET",
+                "endpoint": "/api/blog/search?q=<terms>&limit=<n>&offset=<n>",
+                "description": "Full-text search over visible posts, best matches first. Every term must appear in the post. 'limit' defaults to 20 (max 100); pass 'next_offset' as 'offset' to get the next page.",
+                "request_format": "Query parameters: q (string), limit (integer), offset (integer)",
+                "response_format": {
+                    "posts": "list of posts in the same format as the unpaginated feed",
+                    "next_offset": "integer or null"
+                },
+                "authorization": "Requires session."
+            },
+            {
+                "method": "GET",
+                "endpoint": "/api/blog/export?format=<ndjson|csv>&since=<datetime>",
+                "description": "Stream every blog post as NDJSON (default) or CSV, ordered by creation time. 'since' (ISO 8601) limits the export to posts created at or after that time for incremental exports; times without an offset are taken as UTC.",
+                "request_format": "Query parameters: format (ndjson or csv), since (ISO 8601 datetime, optional)",
+                "response_format": "One record per post with id, author_id, author, created_at and content.",
+                "authorization": "Requires session and admin rights."
+            },
+            {
+                "method": "POST",
+                "endpoint": "/api/blog/batch",
+                "description": "Apply up to 1000 create, update and delete operations in one transaction. Each operation is authorized on its own; rejected operations do not stop the rest.",
+                "request_format": {
+                    "operations": [
+                        {"op": "create", "content": "string", "visible_to": "list of usernames (optional)", "private": "boolean (optional)"},
+                        {"op": "update", "id": "integer", "content": "string (optional)", "visible_to": "list of usernames (optional)", "private": "boolean (optional)"},
+                        {"op": "delete", "id": "integer"}
+                    ]
+                },
+                "response_format": {
+                    "results": [
+                        {"index": "integer", "op": "string", "id": "integer", "status": "integer", "message": "string"}
+                    ]
+                },
+                "authorization": "Requires session. Updates and deletes require owning the post or being an admin."
+            },
+            {
+                "method": "GET",
+                "endpoint": "/api/metrics",
+                "description": "Per-endpoint request counts, latency, SQL statement count and time, and response size histograms.",
+                "request_format": "None",
+                "response_format": "Prometheus text exposition format.",
+                "authorization": "No authorization required."
+            },
             {
                 "method": "GET",
                 "endpoint": "/api/about",
@@ -261,8 +1371,10 @@ def api_documentation():
     }
     return jsonify(documentation), 200
 
-with app.app_context():
-    db.create_all()
-
 if __name__ == '__main__':
+    with app.app_context():
+        try:
+            init_db()
+        except SchemaOutdated as exc:
+            raise SystemExit(f'Cannot start: {exc}')
     app.run(host='0.0.0.0', debug=True)
@@ -0,0 +1,62 @@
+"""Write throughput of /api/blog/batch versus one request per post.
+
+Creates, updates and deletes the same number of posts both ways through
+Flask's test client and reports operations per second for each.
+
+    python benchmarks/batch_writes.py --posts 2000 --batch-size 500
+"""
+import argparse
+import time
+
+from common import load_app
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=2000, help='posts written per phase')
+    parser.add_argument('--batch-size', type=int, default=500, help='operations per batch request')
+    args = parser.parse_args()
+
+    app = load_app()
+
+    client = app.test_client()
+    client.post('/register', json={'username': 'bench', 'password': 'bench-password'})
+    client.post('/login', json={'username': 'bench', 'password': 'bench-password'})
+
+    def post_ids():
+        return [post['id'] for post in client.get('/api/blog').get_json()]
+
+    def send_batches(operations):
+        for start in range(0, len(operations), args.batch_size):
+            response = client.post('/api/blog/batch', json={'operations': operations[start:start + args.batch_size]})
+            assert response.status_code == 200, response.get_json()
+
+    single = {
+        'create': timed(lambda: [client.post('/api/blog', json={'content': f'single {i}'}) for i in range(args.posts)]),
+    }
+    ids = post_ids()
+    single['update'] = timed(lambda: [client.put(f'/api/blog/{post_id}', json={'content': 'edited'}) for post_id in ids])
+    single['delete'] = timed(lambda: [client.delete(f'/api/blog/{post_id}') for post_id in ids])
+
+    batched = {
+        'create': timed(lambda: send_batches([{'op': 'create', 'content': f'batch {i}'} for i in range(args.posts)])),
+    }
+    ids = post_ids()
+    batched['update'] = timed(lambda: send_batches([{'op': 'update', 'id': post_id, 'content': 'edited'} for post_id in ids]))
+    batched['delete'] = timed(lambda: send_batches([{'op': 'delete', 'id': post_id} for post_id in ids]))
+
+    print(f"{'phase':<8}{'single ops/s':>14}{'batch ops/s':>14}{'speedup':>10}")
+    for phase in ('create', 'update', 'delete'):
+        single_rate = args.posts / single[phase]
+        batch_rate = args.posts / batched[phase]
+        print(f"{phase:<8}{single_rate:>14.0f}{batch_rate:>14.0f}{batch_rate / single_rate:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
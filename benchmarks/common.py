@@ -0,0 +1,111 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database: ``load_app`` points
+DATABASE_URL at a temporary file before importing ``app`` and creates the
+schema, so blog.db is never touched.
+"""
+import http.cookiejar
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def use_temp_database():
+    directory = tempfile.mkdtemp(prefix='blog-bench-')
+    path = os.path.join(directory, 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    return path
+
+
+def load_app():
+    use_temp_database()
+    from app import app, init_db
+
+    with app.app_context():
+        init_db()
+    return app
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples):
+    """Summarize a list of latencies in seconds as milliseconds."""
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+@contextmanager
+def serve(app):
+    """Run ``app`` on a local threaded WSGI server and yield its base URL."""
+    from werkzeug.serving import make_server
+
+    # Per-request access logs would swamp the benchmark output
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+class Client:
+    """Minimal HTTP client with its own cookie jar, one per simulated user."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.last_headers = {}
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def request(self, method, path, payload=None, headers=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        try:
+            with self.opener.open(req) as response:
+                self.last_headers = response.headers
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            self.last_headers = error.headers
+            return error.code, error.read()
+
+
+class InProcessClient:
+    """Same interface as Client, backed by Flask's test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.last_headers = {}
+
+    def request(self, method, path, payload=None, headers=None):
+        response = self.client.open(path, method=method, json=payload, headers=headers or {})
+        self.last_headers = response.headers
+        body = response.get_data()
+        # Closing runs call_on_close hooks, which is where streamed responses are measured
+        response.close()
+        return response.status_code, body
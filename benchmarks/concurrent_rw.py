@@ -0,0 +1,104 @@
+"""Concurrent read/write throughput with and without the SQLite engine profile.
+
+Readers page through the feed with the keyset query while writers insert
+posts, each in its own thread and session. The workload runs twice in fresh
+processes, with SQLITE_PRAGMAS=0 (default rollback journal) and with the WAL
+profile, and reports operations per second and lock errors for both.
+
+    python benchmarks/concurrent_rw.py --readers 8 --writers 4 --duration 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy.exc import OperationalError
+
+from common import load_app
+
+
+def run_workload(readers, writers, duration, seed_posts):
+    app = load_app()
+    from app import BlogPost, User, db
+
+    with app.app_context():
+        db.session.add(User(username='writer', password='-'))
+        db.session.flush()
+        db.session.execute(BlogPost.__table__.insert(),
+                           [{'content': f'seed {i}', 'author_id': 1} for i in range(seed_posts)])
+        db.session.commit()
+
+    stop = threading.Event()
+    counts = Counter()
+    lock = threading.Lock()
+
+    def loop(action, name):
+        done = errors = 0
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    action()
+                    done += 1
+                except OperationalError:
+                    db.session.rollback()
+                    errors += 1
+            db.session.remove()
+        with lock:
+            counts[name] += done
+            counts[f'{name}_errors'] += errors
+
+    def read():
+        db.session.query(BlogPost, User.username) \
+            .outerjoin(User, User.id == BlogPost.author_id) \
+            .order_by(BlogPost.created_at.desc(), BlogPost.id.desc()) \
+            .limit(20).all()
+        db.session.rollback()
+
+    def write():
+        db.session.add(BlogPost(content='concurrent write', author_id=1))
+        db.session.commit()
+
+    threads = [threading.Thread(target=loop, args=(read, 'reads')) for _ in range(readers)]
+    threads += [threading.Thread(target=loop, args=(write, 'writes')) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {key: round(value / duration, 1) if not key.endswith('errors') else value
+            for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per run')
+    parser.add_argument('--seed-posts', type=int, default=10000)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_workload(args.readers, args.writers, args.duration, args.seed_posts)))
+        return
+
+    for name, pragmas in (('default', '0'), ('wal', '1')):
+        env = dict(os.environ, SQLITE_PRAGMAS=pragmas)
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--readers', str(args.readers), '--writers', str(args.writers),
+             '--duration', str(args.duration), '--seed-posts', str(args.seed_posts)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{name:>8}: {result.get('reads', 0)} reads/s, {result.get('writes', 0)} writes/s, "
+              f"{result.get('reads_errors', 0)} read errors, {result.get('writes_errors', 0)} write errors")
+
+
+if __name__ == '__main__':
+    main()
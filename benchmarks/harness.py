@@ -0,0 +1,322 @@
+"""Reproducible load test for every endpoint.
+
+Seeds a throwaway database with the requested number of users and posts,
+then drives each route through Flask's test client and/or a local threaded
+WSGI server with concurrent clients. For every endpoint it reports
+throughput, p50/p95/p99 latency and SQL statements per request (read from
+the app's own metrics), and can save the numbers as JSON and compare them
+against a previous run. It exits non-zero if any request failed or, with a
+baseline, if an endpoint regressed beyond the threshold.
+
+    python benchmarks/harness.py --posts 100000 --output before.json
+    python benchmarks/harness.py --posts 100000 --baseline before.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import Client, InProcessClient, ROOT, latency_summary, load_app, serve
+
+PASSWORD = 'bench-password'
+SEED_CHUNK = 10000
+# The legacy feed returns every post, so it only runs on small datasets
+LEGACY_FEED_MAX_POSTS = 10000
+WORDS = ('alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet')
+# Lower is better for these, higher is better for throughput
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def seed(app, users, posts, rng):
+    """Bulk insert users and posts; user 1 is the admin. Returns the first post time."""
+    from werkzeug.security import generate_password_hash
+    from app import BlogPost, User, db, post_viewer, post_viewer_ids
+
+    password = generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'user{i}', 'password': password, 'is_admin': i == 1} for i in range(1, users + 1)
+        ])
+        for offset in range(0, posts, SEED_CHUNK):
+            count = min(SEED_CHUNK, posts - offset)
+            db.session.execute(BlogPost.__table__.insert(), [{
+                'content': ' '.join(rng.choice(WORDS) for _ in range(12)),
+                'author_id': (offset + i) % users + 1,
+                'created_at': start + timedelta(seconds=offset + i),
+            } for i in range(count)])
+            # One post in ten is restricted to a single viewer, stored the way the
+            # app stores it: with a row for the author as well
+            db.session.execute(post_viewer.insert(), [
+                {'post_id': offset + i + 1, 'viewer_id': viewer_id}
+                for i in range(count) if rng.random() < 0.1
+                for viewer_id in post_viewer_ids((offset + i) % users + 1, {rng.randint(1, users)})
+            ])
+            db.session.commit()
+    return start
+
+
+class Scenario:
+    """One endpoint workload: ``build(worker, i)`` returns (method, path, json, headers)."""
+
+    def __init__(self, name, endpoint, build, setup=None, expect=(200,), admin=False, writes=False,
+                 cached=True):
+        self.name = name
+        self.endpoint = endpoint
+        self.build = build
+        self.setup = setup
+        self.expect = expect
+        self.admin = admin
+        self.writes = writes
+        self.cached = cached
+
+
+def scenarios(args, start):
+    from app import BATCH_MAX_OPERATIONS, encode_cursor
+
+    deep_cursor = encode_cursor(start + timedelta(seconds=args.posts // 2), args.posts // 2 + 1)
+    recent = (start + timedelta(seconds=int(args.posts * 0.99))).isoformat()
+
+    def own_post(worker, i):
+        # Seeded posts are authored round-robin, so each worker knows its own ids
+        owned = range(worker['user_id'], args.posts + 1, args.users)
+        return owned[i % len(owned)]
+
+    def fetch_etag(worker):
+        worker['client'].request('GET', '/api/blog?limit=20')
+        worker['etag'] = worker['client'].last_headers.get('ETag')
+
+    def create_targets(worker):
+        worker['targets'] = []
+        for offset in range(0, worker['quota'], BATCH_MAX_OPERATIONS):
+            count = min(BATCH_MAX_OPERATIONS, worker['quota'] - offset)
+            operations = [{'op': 'create', 'content': 'to delete'}] * count
+            status, body = worker['client'].request('POST', '/api/blog/batch', {'operations': operations})
+            if status != 200:
+                raise RuntimeError(f'creating delete targets failed with status {status}')
+            worker['targets'] += [result['id'] for result in json.loads(body)['results']]
+
+    def search_terms(i):
+        return f'{WORDS[i % len(WORDS)]}+{WORDS[(i + 3) % len(WORDS)]}'
+
+    items = [
+        Scenario('check_session', 'check_session', lambda w, i: ('GET', '/api/check-session', None, None)),
+        Scenario('feed_legacy', 'get_posts', lambda w, i: ('GET', '/api/blog', None, None), cached=False),
+        Scenario('feed_page', 'get_posts', lambda w, i: ('GET', '/api/blog?limit=20', None, None), cached=False),
+        Scenario('feed_page_deep', 'get_posts',
+                 lambda w, i: ('GET', f'/api/blog?limit=20&before={deep_cursor}', None, None), cached=False),
+        Scenario('feed_page_cached', 'get_posts', lambda w, i: ('GET', '/api/blog?limit=20', None, None)),
+        Scenario('feed_not_modified', 'get_posts',
+                 lambda w, i: ('GET', '/api/blog?limit=20', None, {'If-None-Match': w['etag']}),
+                 setup=fetch_etag, expect=(304,)),
+        Scenario('search', 'search_posts',
+                 lambda w, i: ('GET', f'/api/blog/search?q={search_terms(i)}', None, None)),
+        Scenario('export_incremental', 'export_posts',
+                 lambda w, i: ('GET', f'/api/blog/export?since={recent}', None, None), admin=True),
+        Scenario('metrics', 'api_metrics', lambda w, i: ('GET', '/api/metrics', None, None)),
+        Scenario('create_post', 'create_post',
+                 lambda w, i: ('POST', '/api/blog', {'content': f'bench post {i}'}, None), expect=(201,), writes=True),
+        Scenario('update_post', 'manage_post',
+                 lambda w, i: ('PUT', f'/api/blog/{own_post(w, i)}', {'content': f'edited {i}'}, None), writes=True),
+        Scenario('batch_create', 'batch_posts',
+                 lambda w, i: ('POST', '/api/blog/batch',
+                               {'operations': [{'op': 'create', 'content': f'batch {i}.{n}'} for n in range(50)]}, None),
+                 writes=True),
+        Scenario('delete_post', 'delete_post',
+                 lambda w, i: ('DELETE', f"/api/blog/{w['targets'].pop()}", None, None), setup=create_targets,
+                 writes=True),
+        Scenario('login', 'login',
+                 lambda w, i: ('POST', '/login', {'username': w['username'], 'password': PASSWORD}, None)),
+    ]
+    if args.posts > LEGACY_FEED_MAX_POSTS:
+        items = [item for item in items if item.name != 'feed_legacy']
+    if args.only:
+        items = [item for item in items if item.name in args.only]
+    return items
+
+
+def make_worker(client, user_id):
+    worker = {'user_id': user_id, 'username': f'user{user_id}', 'client': client}
+    status, _ = client.request('POST', '/login', {'username': worker['username'], 'password': PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login as {worker['username']} failed with status {status}")
+    return worker
+
+
+def run_scenario(scenario, workers, requests):
+    from app import feed_cache, metrics
+
+    for n, worker in enumerate(workers):
+        worker['quota'] = requests // len(workers) + (1 if n < requests % len(workers) else 0)
+        if scenario.setup:
+            scenario.setup(worker)
+
+    label = (('endpoint', scenario.endpoint),)
+    sql_before = metrics.totals('http_request_sql_statements').get(label, (0, 0))
+    latencies, errors, lock = [], [], threading.Lock()
+
+    def drive(worker):
+        local, failed = [], 0
+        for i in range(worker['quota']):
+            method, path, payload, headers = scenario.build(worker, i)
+            began = time.perf_counter()
+            status, _ = worker['client'].request(method, path, payload, headers)
+            local.append(time.perf_counter() - began)
+            failed += status not in scenario.expect
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    # Uncached scenarios measure the database path, so the feed cache is
+    # switched off for their duration
+    max_entries = feed_cache.max_entries
+    if not scenario.cached:
+        feed_cache.max_entries = 0
+        feed_cache.clear()
+    threads = [threading.Thread(target=drive, args=(worker,)) for worker in workers]
+    began = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        feed_cache.max_entries = max_entries
+    elapsed = time.perf_counter() - began
+
+    sql_after = metrics.totals('http_request_sql_statements').get(label, (0, 0))
+    handled = sql_after[1] - sql_before[1]
+    result = latency_summary(latencies)
+    result.update(
+        throughput_rps=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        queries_per_request=round((sql_after[0] - sql_before[0]) / handled, 2) if handled else 0.0,
+        errors=sum(errors),
+    )
+    return result
+
+
+def run_mode(app, mode, args, items):
+    print(f'{mode}:')
+    if mode == 'server':
+        with serve(app) as base_url:
+            return run_scenarios(lambda: Client(base_url), args, items)
+    return run_scenarios(lambda: InProcessClient(app), args, items)
+
+
+def run_scenarios(new_client, args, items):
+    results = {}
+    for scenario in items:
+        # Regular users are user2..userN; the admin (user1) runs admin-only scenarios
+        user_ids = [1] * args.concurrency if scenario.admin else range(2, args.concurrency + 2)
+        workers = [make_worker(new_client(), user_id) for user_id in user_ids]
+        result = run_scenario(scenario, workers, args.requests)
+        results[scenario.name] = result
+        print(f"  {scenario.name:<20}{result['throughput_rps']:>9} rps  p50 {result['p50_ms']:>8}ms  "
+              f"p95 {result['p95_ms']:>8}ms  p99 {result['p99_ms']:>8}ms  "
+              f"{result['queries_per_request']:>6} q/req  {result['errors']} errors")
+    return results
+
+
+def find_regressions(baseline, current, threshold):
+    """List endpoints that returned errors, or whose latency grew or throughput
+    dropped by more than ``threshold``."""
+    regressions = []
+    for mode, scenarios_ in current['results'].items():
+        for name, result in scenarios_.items():
+            before = baseline.get('results', {}).get(mode, {}).get(name)
+            # Failed requests are usually fast, so errors are never excused by timings
+            if result['errors']:
+                baseline_errors = f" (baseline {before['errors']})" if before else ''
+                regressions.append(f"{mode}/{name}: {result['errors']} errors{baseline_errors}")
+            if not before:
+                continue
+            for key in LATENCY_KEYS:
+                if before[key] and result[key] > before[key] * (1 + threshold):
+                    regressions.append(f'{mode}/{name}: {key} {before[key]} -> {result[key]}')
+            if before['throughput_rps'] and result['throughput_rps'] < before['throughput_rps'] * (1 - threshold):
+                regressions.append(f"{mode}/{name}: throughput_rps {before['throughput_rps']} -> {result['throughput_rps']}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--posts', type=int, default=1000, help='e.g. 1000, 100000 or 1000000')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--mode', choices=('testclient', 'server', 'both'), default='both')
+    parser.add_argument('--only', nargs='*', help='run only these scenarios')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the generated data')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a previous JSON result')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed relative regression before failing (default 0.10)')
+    args = parser.parse_args()
+
+    if args.users < args.concurrency + 1:
+        parser.error('--users must exceed --concurrency (user1 is reserved as admin)')
+
+    app = load_app()
+    began = time.perf_counter()
+    start = seed(app, args.users, args.posts, random.Random(args.seed))
+    print(f'Seeded {args.users} users and {args.posts} posts in {time.perf_counter() - began:.1f}s')
+
+    modes = ('testclient', 'server') if args.mode == 'both' else (args.mode,)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'users': args.users,
+            'posts': args.posts,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+        },
+        'results': {mode: {} for mode in modes},
+    }
+    # Every mode runs the read-only scenarios before any mode writes, so all
+    # modes read the same dataset
+    items = scenarios(args, start)
+    for writes in (False, True):
+        phase = [item for item in items if item.writes == writes]
+        if not phase:
+            continue
+        for mode in modes:
+            report['results'][mode].update(run_mode(app, mode, args, phase))
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        print(f'Results written to {args.output}')
+
+    # Without a baseline only failed requests count as regressions
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    regressions = find_regressions(baseline, report, args.threshold)
+    if regressions:
+        print(f'Regressions beyond {args.threshold:.0%}:')
+        for line in regressions:
+            print(f'  {line}')
+        sys.exit(1)
+    if args.baseline:
+        print(f'No regressions beyond {args.threshold:.0%}.')
+
+
+if __name__ == '__main__':
+    main()
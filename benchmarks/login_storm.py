@@ -0,0 +1,91 @@
+"""Latency of non-auth endpoints while /login is flooded.
+
+Runs the same storm twice in fresh processes: once with inline hashing
+(HASH_WORKERS=0, the old behaviour) and once with the process pool, and
+reports p50/p95/p99 of GET /api/check-session alongside login outcomes.
+
+    python benchmarks/login_storm.py --clients 32 --duration 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import Client, latency_summary, load_app, serve
+
+
+def run_storm(clients, duration):
+    app = load_app()
+
+    with serve(app) as base_url:
+        Client(base_url).request('POST', '/register', {'username': 'storm', 'password': 'storm-password'})
+
+        stop = threading.Event()
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def storm():
+            client = Client(base_url)
+            while not stop.is_set():
+                status, _ = client.request('POST', '/login', {'username': 'storm', 'password': 'storm-password'})
+                with lock:
+                    outcomes[status] += 1
+
+        probe_latencies = []
+
+        def probe():
+            client = Client(base_url)
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.request('GET', '/api/check-session')
+                probe_latencies.append(time.perf_counter() - start)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=storm) for _ in range(clients)]
+        threads.append(threading.Thread(target=probe))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        'check_session': latency_summary(probe_latencies),
+        'login_status': {str(status): count for status, count in sorted(outcomes.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per run')
+    parser.add_argument('--workers', type=int, help='HASH_WORKERS for the pooled run')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_storm(args.clients, args.duration)))
+        return
+
+    runs = [('inline', '0'), ('pool', str(args.workers) if args.workers is not None else None)]
+    for name, workers in runs:
+        env = dict(os.environ)
+        if workers is not None:
+            env['HASH_WORKERS'] = workers
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--clients', str(args.clients), '--duration', str(args.duration)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        probe = result['check_session']
+        print(f"{name:>6}: check-session p50={probe['p50_ms']}ms p95={probe['p95_ms']}ms "
+              f"p99={probe['p99_ms']}ms ({probe['count']} samples); login statuses {result['login_status']}")
+
+
+if __name__ == '__main__':
+    main()
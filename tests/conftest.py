@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+
+# The app reads its configuration at import time, so the test database and a
+# cheap inline password hash are set up before it is imported
+DB_DIR = tempfile.mkdtemp(prefix='blog-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(DB_DIR, 'blog.db')}"
+os.environ['HASH_WORKERS'] = '0'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import BlogPost, User, app, db, feed_cache, init_db, post_viewer
+
+PASSWORD = 'secret'
+
+with app.app_context():
+    init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    yield
+    with app.app_context():
+        db.session.execute(post_viewer.delete())
+        db.session.execute(db.delete(BlogPost))
+        db.session.execute(db.delete(User))
+        db.session.commit()
+    feed_cache.clear()
+
+
+@pytest.fixture
+def login():
+    """Create a user and return a test client logged in as them."""
+
+    def login(username, is_admin=False):
+        with app.app_context():
+            password = generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+            db.session.add(User(username=username, password=password, is_admin=is_admin))
+            db.session.commit()
+        client = app.test_client()
+        response = client.post('/login', json={'username': username, 'password': PASSWORD})
+        assert response.status_code == 200
+        return client
+
+    return login
+
+
+def create_post(client, content, **fields):
+    """Create a post through the API and return its id."""
+    response = client.post('/api/blog/batch', json={'operations': [dict(op='create', content=content, **fields)]})
+    result = response.get_json()['results'][0]
+    assert result['status'] == 201, result
+    return result['id']
+
+
+def feed_contents(client):
+    response = client.get('/api/blog')
+    assert response.status_code == 200
+    return {post['content'] for post in response.get_json()}
@@ -0,0 +1,96 @@
+from app import BlogPost, app, db
+from conftest import create_post, feed_contents
+
+
+def batch(client, *operations):
+    response = client.post('/api/blog/batch', json={'operations': list(operations)})
+    assert response.status_code == 200
+    return [(result['status'], result.get('id')) for result in response.get_json()['results']]
+
+
+def post_content(post_id):
+    with app.app_context():
+        post = db.session.get(BlogPost, post_id)
+        return post.content if post else None
+
+
+def test_each_operation_is_authorized_separately(login):
+    alice, bob = login('alice'), login('bob')
+    own = create_post(bob, 'mine')
+    other = create_post(alice, 'not yours')
+
+    results = batch(
+        bob,
+        {'op': 'update', 'id': own, 'content': 'edited'},
+        {'op': 'update', 'id': other, 'content': 'hijacked'},
+        {'op': 'delete', 'id': other},
+        {'op': 'update', 'id': 999999, 'content': 'nothing'},
+        {'op': 'delete', 'id': 'abc'},
+        {'op': 'publish', 'id': own},
+    )
+
+    assert [status for status, _ in results] == [200, 403, 403, 404, 404, 400]
+    assert post_content(own) == 'edited'
+    assert post_content(other) == 'not yours'
+
+
+def test_admin_may_change_any_post(login):
+    alice, admin = login('alice'), login('admin', is_admin=True)
+    post_id = create_post(alice, 'hello')
+
+    assert batch(admin, {'op': 'update', 'id': post_id, 'content': 'moderated'}) == [(200, post_id)]
+    assert post_content(post_id) == 'moderated'
+
+
+def test_delete_wins_over_update_of_the_same_post(login):
+    alice = login('alice')
+    post_id = create_post(alice, 'hello')
+
+    results = batch(
+        alice,
+        {'op': 'update', 'id': post_id, 'content': 'edited'},
+        {'op': 'delete', 'id': post_id},
+        {'op': 'update', 'id': post_id, 'content': 'edited again'},
+        {'op': 'delete', 'id': post_id},
+    )
+
+    assert [status for status, _ in results] == [200, 200, 404, 404]
+    assert post_content(post_id) is None
+    assert feed_contents(alice) == set()
+
+
+def test_creates_keep_their_own_viewers(login):
+    alice, bob = login('alice'), login('bob')
+
+    results = batch(
+        alice,
+        {'op': 'create', 'content': 'same'},
+        {'op': 'create', 'content': 'same', 'visible_to': ['bob']},
+        {'op': 'create', 'content': 'same', 'private': True},
+        {'op': 'create', 'content': ''},
+    )
+
+    assert [status for status, _ in results] == [201, 201, 201, 400]
+    ids = [post_id for _, post_id in results[:3]]
+    assert len(set(ids)) == 3
+    assert alice.get(f'/api/blog/{ids[0]}/viewers').get_json() == {'viewers': []}
+    assert alice.get(f'/api/blog/{ids[1]}/viewers').get_json() == {'viewers': ['alice', 'bob']}
+    assert alice.get(f'/api/blog/{ids[2]}/viewers').get_json() == {'viewers': ['alice']}
+    assert len(bob.get('/api/blog').get_json()) == 2
+
+
+def test_malformed_operations_fail_on_their_own(login):
+    alice = login('alice')
+    post_id = create_post(alice, 'hello')
+    assert post_id == 1
+
+    results = batch(
+        alice,
+        {'op': 'create', 'content': 'bad viewers', 'visible_to': 7},
+        {'op': 'delete', 'id': True},
+        {'op': 'update', 'id': True, 'content': 'edited'},
+        {'op': 'create', 'content': 'fine', 'visible_to': ['alice']},
+    )
+
+    assert [status for status, _ in results] == [400, 404, 404, 201]
+    assert post_content(post_id) == 'hello'
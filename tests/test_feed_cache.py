@@ -0,0 +1,105 @@
+from app import FeedState, app, db
+from conftest import create_post
+
+
+def feed(client, headers=None, path='/api/blog?limit=10'):
+    return client.get(path, headers=headers or {})
+
+
+def test_feed_has_validators(login):
+    alice = login('alice')
+    create_post(alice, 'hello')
+
+    response = feed(alice)
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert response.cache_control.private and response.cache_control.no_cache
+    assert 'Cookie' in response.vary
+
+
+def test_conditional_requests_are_answered_with_304(login):
+    alice = login('alice')
+    create_post(alice, 'hello')
+    response = feed(alice)
+
+    assert feed(alice, {'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert feed(alice, {'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+    assert feed(alice, {'If-None-Match': '"something-else"'}).status_code == 200
+
+
+def test_unrelated_query_arguments_share_the_cache_entry(login):
+    alice = login('alice')
+    create_post(alice, 'hello')
+
+    etag = feed(alice).headers['ETag']
+    assert feed(alice, path='/api/blog?limit=10&utm=1').headers['ETag'] == etag
+    assert feed(alice, path='/api/blog?limit=11').headers['ETag'] != etag
+
+
+def assert_invalidated(client, write):
+    before = feed(client)
+    write()
+    after = feed(client, {'If-None-Match': before.headers['ETag'],
+                          'If-Modified-Since': before.headers['Last-Modified']})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before.headers['ETag']
+    return after.get_json()['posts']
+
+
+def test_every_write_invalidates_the_feed(login):
+    alice, bob = login('alice'), login('bob')
+    post_id = create_post(alice, 'hello')
+
+    posts = assert_invalidated(bob, lambda: create_post(alice, 'second'))
+    assert [post['content'] for post in posts] == ['second', 'hello']
+
+    posts = assert_invalidated(bob, lambda: alice.put(f'/api/blog/{post_id}', json={'content': 'edited'}))
+    assert [post['content'] for post in posts] == ['second', 'edited']
+
+    posts = assert_invalidated(
+        bob, lambda: alice.put(f'/api/blog/{post_id}', json={'visible_to': ['alice']}))
+    assert [post['content'] for post in posts] == ['second']
+
+    posts = assert_invalidated(
+        bob, lambda: alice.post(f'/api/blog/{post_id}/viewers', json={'usernames': ['bob']}))
+    assert [post['content'] for post in posts] == ['second', 'edited']
+
+    posts = assert_invalidated(
+        bob, lambda: alice.delete(f'/api/blog/{post_id}/viewers', json={'usernames': ['bob']}))
+    assert [post['content'] for post in posts] == ['second']
+
+    posts = assert_invalidated(alice, lambda: alice.delete(f'/api/blog/{post_id}'))
+    assert [post['content'] for post in posts] == ['second']
+
+
+def test_each_viewer_gets_their_own_page(login):
+    alice, bob = login('alice'), login('bob')
+    create_post(alice, 'hello')
+
+    # can_delete differs per viewer, so a cached body must never be shared
+    for _ in range(2):
+        assert [post['can_delete'] for post in feed(alice).get_json()['posts']] == [True]
+        assert [post['can_delete'] for post in feed(bob).get_json()['posts']] == [False]
+    assert feed(alice).headers['ETag'] != feed(bob).headers['ETag']
+
+
+def test_missing_feed_state_row_is_created_on_demand(login):
+    alice = login('alice')
+    with app.app_context():
+        db.session.execute(db.delete(FeedState))
+        db.session.commit()
+
+    assert feed(alice).status_code == 200
+    create_post(alice, 'hello')
+    assert [post['content'] for post in feed(alice).get_json()['posts']] == ['hello']
+
+    with app.app_context():
+        db.session.execute(db.delete(FeedState))
+        db.session.commit()
+
+    # A write on a database without the row creates it as well
+    create_post(alice, 'second')
+    with app.app_context():
+        assert db.session.get(FeedState, 1).version == 1
+    assert [post['content'] for post in feed(alice).get_json()['posts']] == ['second', 'hello']
@@ -0,0 +1,104 @@
+from conftest import create_post
+
+
+def seed_posts(client):
+    """Create ten posts, the middle five in one batch so they share created_at."""
+    ids = [create_post(client, f'single {n}') for n in range(3)]
+    response = client.post('/api/blog/batch', json={'operations': [
+        {'op': 'create', 'content': f'batch {n}'} for n in range(5)
+    ]})
+    ids += [result['id'] for result in response.get_json()['results']]
+    ids += [create_post(client, f'single {n}') for n in range(3, 5)]
+    return ids[::-1]
+
+
+def page(client, **args):
+    response = client.get('/api/blog', query_string=args)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_before_walks_the_feed_newest_first(login):
+    alice = login('alice')
+    newest_first = seed_posts(alice)
+
+    pages, data = [], page(alice, limit=3)
+    assert data['prev_cursor'] is None
+    while True:
+        pages.append([post['id'] for post in data['posts']])
+        if not data['next_cursor']:
+            break
+        data = page(alice, limit=3, before=data['next_cursor'])
+        assert data['prev_cursor']
+
+    assert pages == [newest_first[0:3], newest_first[3:6], newest_first[6:9], newest_first[9:]]
+
+
+def test_after_walks_back_to_the_first_page(login):
+    alice = login('alice')
+    newest_first = seed_posts(alice)
+
+    first = page(alice, limit=4)
+    second = page(alice, limit=4, before=first['next_cursor'])
+    last = page(alice, limit=4, before=second['next_cursor'])
+    assert [post['id'] for post in last['posts']] == newest_first[8:]
+    assert last['next_cursor'] is None
+
+    # Walking back with "after" returns the same pages in the same order
+    back = page(alice, limit=4, after=last['prev_cursor'])
+    assert back['posts'] == second['posts']
+    assert back['next_cursor'] and back['prev_cursor']
+    back = page(alice, limit=4, after=back['prev_cursor'])
+    assert back['posts'] == first['posts']
+    assert back['prev_cursor'] is None
+
+
+def test_page_ending_exactly_at_the_oldest_post_has_no_next_cursor(login):
+    alice = login('alice')
+    newest_first = seed_posts(alice)
+
+    first = page(alice, limit=5)
+    assert [post['id'] for post in first['posts']] == newest_first[:5]
+    second = page(alice, limit=5, before=first['next_cursor'])
+    assert [post['id'] for post in second['posts']] == newest_first[5:]
+    assert second['next_cursor'] is None
+
+
+def test_empty_feed_has_no_cursors(login):
+    alice = login('alice')
+    assert page(alice, limit=5) == {'posts': [], 'next_cursor': None, 'prev_cursor': None}
+
+
+def test_invalid_paging_arguments_are_rejected(login):
+    alice = login('alice')
+    create_post(alice, 'hello')
+
+    for args in ({'limit': 0}, {'limit': -1}, {'limit': 'ten'}, {'before': 'not-a-cursor'},
+                 {'after': '!!!'}, {'limit': 1, 'before': 'abc', 'after': 'abc'}):
+        response = alice.get('/api/blog', query_string=args)
+        assert response.status_code == 400, args
+
+
+def test_limit_is_capped(login):
+    alice = login('alice')
+    alice.post('/api/blog/batch', json={'operations': [
+        {'op': 'create', 'content': f'post {n}'} for n in range(105)
+    ]})
+
+    data = page(alice, limit=1000)
+    assert len(data['posts']) == 100
+    assert data['next_cursor']
+
+
+def test_legacy_feed_returns_every_visible_post(login):
+    alice, bob = login('alice'), login('bob')
+    public_id = create_post(alice, 'public')
+    create_post(alice, 'private', private=True)
+
+    response = bob.get('/api/blog')
+    assert response.status_code == 200
+    posts = response.get_json()
+    assert isinstance(posts, list)
+    assert [post['id'] for post in posts] == [public_id]
+    assert set(posts[0]) == {'id', 'content', 'author', 'created_at', 'can_delete'}
+    assert posts[0]['author'] == 'alice' and posts[0]['can_delete'] is False
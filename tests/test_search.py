@@ -0,0 +1,23 @@
+from conftest import create_post
+
+
+def search(client, q):
+    return client.get('/api/blog/search', query_string={'q': q})
+
+
+def test_search_matches_terms_literally(login):
+    alice = login('alice')
+    post_id = create_post(alice, 'caching the feed with "etags"')
+    create_post(alice, 'something else')
+
+    for q in ('feed', 'etags', '"etags', 'the-feed', 'feed\x00etags'):
+        response = search(alice, q)
+        assert response.status_code == 200, q
+        assert [post['id'] for post in response.get_json()['posts']] == [post_id], q
+
+
+def test_empty_or_control_only_query_is_rejected(login):
+    alice = login('alice')
+
+    for q in ('', '   ', '\x00', '\x01\x1f'):
+        assert search(alice, q).status_code == 400
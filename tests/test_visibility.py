@@ -0,0 +1,82 @@
+from conftest import create_post, feed_contents
+
+
+def test_public_post_is_visible_to_everyone(login):
+    alice, bob, admin = login('alice'), login('bob'), login('admin', is_admin=True)
+    create_post(alice, 'hello world')
+
+    for client in (alice, bob, admin):
+        assert feed_contents(client) == {'hello world'}
+
+
+def test_restricted_post_is_visible_to_author_viewers_and_admin(login):
+    alice, bob, carol, admin = login('alice'), login('bob'), login('carol'), login('admin', is_admin=True)
+    post_id = create_post(alice, 'for bob', visible_to=['bob'])
+
+    assert feed_contents(alice) == {'for bob'}
+    assert feed_contents(bob) == {'for bob'}
+    assert feed_contents(admin) == {'for bob'}
+    assert feed_contents(carol) == set()
+
+    # Paged feed and search apply the same filter
+    assert carol.get('/api/blog?limit=10').get_json()['posts'] == []
+    assert carol.get('/api/blog/search?q=bob').get_json()['posts'] == []
+    assert [post['id'] for post in bob.get('/api/blog/search?q=bob').get_json()['posts']] == [post_id]
+
+
+def test_private_post_is_visible_to_author_and_admin_only(login):
+    alice, bob, admin = login('alice'), login('bob'), login('admin', is_admin=True)
+    post_id = create_post(alice, 'draft')
+    assert alice.put(f'/api/blog/{post_id}', json={'private': True}).status_code == 200
+
+    assert feed_contents(alice) == {'draft'}
+    assert feed_contents(admin) == {'draft'}
+    assert feed_contents(bob) == set()
+
+
+def test_removing_every_viewer_keeps_post_private(login):
+    alice, bob = login('alice'), login('bob')
+    post_id = create_post(alice, 'for bob', visible_to=['bob'])
+
+    response = alice.delete(f'/api/blog/{post_id}/viewers', json={'usernames': ['bob', 'alice']})
+    assert response.status_code == 200
+    assert alice.get(f'/api/blog/{post_id}/viewers').get_json() == {'viewers': ['alice']}
+    assert feed_contents(bob) == set()
+    assert feed_contents(alice) == {'for bob'}
+
+
+def test_empty_visible_to_makes_post_public(login):
+    alice, bob = login('alice'), login('bob')
+    post_id = create_post(alice, 'draft', private=True)
+    assert feed_contents(bob) == set()
+
+    assert alice.put(f'/api/blog/{post_id}', json={'visible_to': []}).status_code == 200
+    assert feed_contents(bob) == {'draft'}
+
+
+def test_unknown_viewer_is_rejected(login):
+    alice = login('alice')
+    post_id = create_post(alice, 'hello')
+
+    response = alice.put(f'/api/blog/{post_id}', json={'visible_to': ['ghost']})
+    assert response.status_code == 400
+    assert response.get_json()['usernames'] == ['ghost']
+
+
+def test_viewers_are_managed_by_author_or_admin_only(login):
+    alice, bob, admin = login('alice'), login('bob'), login('admin', is_admin=True)
+    post_id = create_post(alice, 'hello')
+
+    assert bob.post(f'/api/blog/{post_id}/viewers', json={'usernames': ['bob']}).status_code == 403
+    assert admin.post(f'/api/blog/{post_id}/viewers', json={'usernames': ['bob']}).status_code == 200
+    assert alice.get(f'/api/blog/{post_id}/viewers').get_json() == {'viewers': ['alice', 'bob']}
+
+
+def test_malformed_viewer_list_is_rejected(login):
+    alice = login('alice')
+    post_id = create_post(alice, 'hello')
+
+    for value in (5, {'bob': True}, True):
+        assert alice.put(f'/api/blog/{post_id}', json={'visible_to': value}).status_code == 400
+        assert alice.post(f'/api/blog/{post_id}/viewers', json={'usernames': value}).status_code == 400
+    assert alice.get(f'/api/blog/{post_id}/viewers').get_json() == {'viewers': []}